@@ -1,8 +1,34 @@
-import copy
-import itertools
+import functools
 import random
 
 
+@functools.lru_cache(maxsize=None)
+def _board_cells(height, width):
+    """
+    Returns the set of every cell on a board of the given size.
+    """
+    return frozenset((i, j) for i in range(height) for j in range(width))
+
+
+@functools.lru_cache(maxsize=None)
+def _board_neighbours(height, width):
+    """
+    Returns a dict mapping every cell on a board of the given size
+    to the set of its neighbouring cells.
+    """
+    return {
+        (i, j): frozenset(
+            (i + di, j + dj)
+            for di in (-1, 0, 1)
+            for dj in (-1, 0, 1)
+            if (di, dj) != (0, 0)
+            and 0 <= i + di < height
+            and 0 <= j + dj < width
+        )
+        for i, j in _board_cells(height, width)
+    }
+
+
 class Minesweeper():
     """
     Minesweeper game representation
@@ -13,7 +39,6 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
         # Initialize an empty field with no mines
         self.board = []
@@ -23,17 +48,18 @@ class Minesweeper():
                 row.append(False)
             self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, drawing distinct flat indices in one go
+        flat = random.sample(range(self.height * self.width), mines)
+        self.mines = {(c // self.width, c % self.width) for c in flat}
+        for i, j in self.mines:
+            self.board[i][j] = True
 
         # At first, player has found no mines
         self.mines_found = set()
 
+        # Neighbours of every cell, shared by every board of this size
+        self._neighbours = _board_neighbours(height, width)
+
     def print(self):
         """
         Prints a text-based representation
@@ -63,18 +89,10 @@ class Minesweeper():
         # Keep count of nearby mines
         count = 0
 
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+        # Loop over the cell's neighbours, which are always on the board
+        for i, j in self._neighbours[cell]:
+            if self.board[i][j]:
+                count += 1
 
         return count
 
@@ -123,24 +141,16 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        new_cells = set()
-        for c in self.cells:
-            if c != cell:
-                new_cells.add(c)
-            else:
-                self.count -= 1
-        self.cells = new_cells
+        if cell in self.cells:
+            self.cells.remove(cell)
+            self.count -= 1
 
     def mark_safe(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        new_cells = set()
-        for c in self.cells:
-            if c != cell:
-                new_cells.add(c)
-        self.cells = new_cells
+        self.cells.discard(cell)
 
 
 class MinesweeperAI():
@@ -161,17 +171,36 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # Safe cells that have not been clicked on yet
+        self._safe_unplayed = set()
+
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Sentences added or changed since the last subset pass, by id
+        self._dirty = {}
+
+        # Every cell on the board and its neighbours, shared by every
+        # AI playing a board of this size
+        self._all_cells = _board_cells(height, width)
+        self._neighbours = _board_neighbours(height, width)
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        # walk backwards so emptied sentences can be deleted as we go
+        for index in range(len(self.knowledge) - 1, -1, -1):
+            sentence = self.knowledge[index]
+            if cell in sentence.cells:
+                sentence.mark_mine(cell)
+                if sentence.cells:
+                    self._dirty[id(sentence)] = sentence
+                else:
+                    del self.knowledge[index]
+                    self._dirty.pop(id(sentence), None)
 
     def mark_safe(self, cell):
         """
@@ -180,8 +209,18 @@ class MinesweeperAI():
         """
 
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self._safe_unplayed.add(cell)
+        # walk backwards so emptied sentences can be deleted as we go
+        for index in range(len(self.knowledge) - 1, -1, -1):
+            sentence = self.knowledge[index]
+            if cell in sentence.cells:
+                sentence.mark_safe(cell)
+                if sentence.cells:
+                    self._dirty[id(sentence)] = sentence
+                else:
+                    del self.knowledge[index]
+                    self._dirty.pop(id(sentence), None)
 
     def add_knowledge(self, cell, count):
         """
@@ -200,6 +239,7 @@ class MinesweeperAI():
         """
         # 1) mark the cell as a move that has been made
         self.moves_made.add(cell)
+        self._safe_unplayed.discard(cell)
 
         # 2) mark the cell as safe
         self.mark_safe(cell)
@@ -210,48 +250,41 @@ class MinesweeperAI():
         #  to indicate that count of the cell’s neighbors are mines.
         #  Be sure to only include cells whose state is still undetermined in the sentence.
 
-        def create_neighbours(cell):
-            neighbours = []
-            # pattern we see for cell[0] is first three -1 then 0 then plus 1
-            # for cell[1] we can see first -1 second 0 third +1
-            for i in range(-1, 2):
-                for j in range(-1, 2):
-                    neighb = (cell[0] +i, cell[1] +j)
-                    # make sure the cells are in the field
-                    # when our cell is on a wall or in the corner
-                    if neighb[0] >= 0 and neighb[0] <= 7 and neighb[1] >= 0 and neighb[1] <= 7 :
-                        if neighb != cell:
-                            neighbours.append(neighb)
-            return neighbours
-        # now we loop through our cells and check if they are mines or safes
-        # then we remove the ones that are 
-
-        neighbours = create_neighbours(cell)
-        for c in list(neighbours):
-            if c in self.mines:
-                neighbours.remove(c)
-                count -= 1
-            if c in self.safes:
-                neighbours.remove(c)
+        # now we remove the neighbours we already know are mines or safes,
+        # lowering the count by the number of known mines
+
+        neighbours = set(self._neighbours[cell])
+        neighbours -= self.safes
+        mines_here = neighbours & self.mines
+        count -= len(mines_here)
+        neighbours -= mines_here
 
 
         # then we can add a new sentence to our knowledge base 
-        # containing the cells and the count
+        # containing the cells and the count, unless we already know it
         sentence = Sentence(neighbours, count)
-        self.knowledge.append(sentence)
+        if neighbours and sentence not in self.knowledge:
+            self.knowledge.append(sentence)
+            self._dirty[id(sentence)] = sentence
 
         # 4) mark any additional cells as safe or as mines if it can be concluded based on the AI's knowledge base
-        
-        for knowledge in self.knowledge:
-            if knowledge.known_mines():
-                [self.mark_mine(cell) for cell in  knowledge.cells]
-                
-            if knowledge.known_safes():
-                [self.mark_safe(cell) for cell in  knowledge.cells]
-
-
-        ## Remove empty Sentences
-        self.knowledge = [k for k in self.knowledge if len(k.cells)]
+        # collect everything the knowledge base tells us first, then mark it
+        # in one pass, repeating only while new facts keep turning up
+        changed = True
+        while changed:
+            new_mines = set()
+            new_safes = set()
+            for knowledge in self.knowledge:
+                new_mines |= knowledge.known_mines()
+                new_safes |= knowledge.known_safes()
+            new_mines -= self.mines
+            new_safes -= self.safes
+
+            changed = bool(new_mines or new_safes)
+            for c in new_mines:
+                self.mark_mine(c)
+            for c in new_safes:
+                self.mark_safe(c)
 
         # 5) add any new sentences to the AI's knowledge base if they can be inferred from existing knowledge
         """
@@ -263,13 +296,59 @@ class MinesweeperAI():
         KNOWLEDGE AFTER    {(0, 3), (1, 3)} = 1 
                            {(2, 1), (2, 3), (2, 2)} = 1
         """
-        # TODO i dont like the modifing the thing we loop through  
-        for knowledge in self.knowledge:
-            for k in self.knowledge: 
-                if k.cells.issubset(knowledge.cells) and k is not knowledge:
-                    knowledge.cells -= k.cells
-                    knowledge.count -= k.count
-
+        # only sentences added or changed since the last pass can form new
+        # subset pairs, so there is nothing to do if none were
+        if not self._dirty:
+            return
+
+        # start from those and compare each against a snapshot of the
+        # knowledge base, skipping pairs whose sizes rule out a strict subset
+        sentences = list(self.knowledge)
+        pending = {id(k): k for k in sentences if id(k) in self._dirty}
+        self._dirty = {}
+
+        while pending:
+            _, k = pending.popitem()
+            if not k.cells:
+                continue
+            for knowledge in sentences:
+                if knowledge is k or not knowledge.cells:
+                    continue
+                if (
+                    len(knowledge.cells) > len(k.cells)
+                    and k.cells <= knowledge.cells
+                ):
+                    self._subtract(knowledge, k)
+                    pending[id(knowledge)] = knowledge
+                elif (
+                    len(k.cells) > len(knowledge.cells)
+                    and knowledge.cells <= k.cells
+                ):
+                    self._subtract(k, knowledge)
+                    pending[id(k)] = k
+                    if not k.cells:
+                        break
+
+    def _subtract(self, knowledge, k):
+        """
+        Removes the cells of sentence `k` from its superset `knowledge`.
+        """
+        knowledge.cells -= k.cells
+        knowledge.count -= k.count
+
+        # a sentence we already hold adds nothing, so drop it, emptying it
+        # as well so the subset pass's snapshot skips it
+        if any(
+            other is not knowledge and other == knowledge
+            for other in self.knowledge
+        ):
+            for index, other in enumerate(self.knowledge):
+                if other is knowledge:
+                    del self.knowledge[index]
+                    break
+            self._dirty.pop(id(knowledge), None)
+            knowledge.cells.clear()
+            knowledge.count = 0
 
     def make_safe_move(self):
         """
@@ -280,12 +359,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        
-        # Check in self.moves_made to see what moves are still left
-        # Check in self.safes what what is safe
-        for move in self.safes:
-            if move not in self.moves_made:
-                return move
+        return next(iter(self._safe_unplayed), None)
 
     def make_random_move(self):
         """
@@ -294,13 +368,7 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-         
-        possible_moves = []
-        for i in range(0, 8):
-            for j in range(0, 8):
-                if (i, j) not in self.mines and (i, j) not in self.moves_made:
-                    possible_moves.append((i,j))
-        try:
-            return possible_moves[0]
-        except:
+        possible_moves = self._all_cells - self.mines - self.moves_made
+        if not possible_moves:
             return None
+        return random.choice(tuple(possible_moves))